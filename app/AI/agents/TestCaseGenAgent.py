@@ -1,18 +1,31 @@
 import re
 import os
+import time
 import pandas as pd
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
+from AI.utils.model_router import router
+from AI.utils.structured_output import request_records, retry_failed_records
 from AI.tools.api_retriever import get_full_api_info
 
+TEST_CASE_RECORD_PROPERTIES = {
+    "No": {"type": "integer"},
+    "테스트 케이스 내용": {"type": "string"},
+    "사전조건": {"type": "string", "allow_empty": True},
+    "테스트 데이터": {"type": "string"},
+    "예상 결과": {"type": "string"},
+}
+
 class TestCaseGenerationAgent:
     display_name = "테스트 케이스 생성 에이전트"
     description = "요구사항 정의서를 기반으로 테스트 케이스를 생성하고, 구조화된 CSV로 저장합니다."
     category = "테스트 케이스 생성"
     features = "- 요구사항 기반 케이스 작성\n- 테스트 조건 및 예상 결과 포함"
 
-    def __init__(self, temperature: float = 0.3, model: str = "gpt-4o-mini"):
-        self.llm = ChatOpenAI(temperature=temperature, model=model, streaming=False)
+    def __init__(self, temperature: float = 0.3, model: str = None, structured_output: bool = True):
+        self.structured_output = structured_output
+        self.model = model or router.model_for("test_case_generation")
+        self.llm = ChatOpenAI(temperature=temperature, model=self.model, streaming=False)
 
         current_dir = os.path.dirname(os.path.abspath(__file__))
         prompt_path = os.path.join(current_dir, "..", "prompts", "test_case_generation_prompt.txt")
@@ -53,14 +66,47 @@ class TestCaseGenerationAgent:
             api_info = get_full_api_info.invoke({"file_path": yaml_path})["content"]
         )
 
-        case_msg = self.llm.invoke(full_prompt)
-        case_text = case_msg.content if hasattr(case_msg, "content") else str(case_msg)
+        if self.structured_output:
+            parsed_records = self._generate_structured(full_prompt)
+        else:
+            start_time = time.time()
+            case_msg = self.llm.invoke(full_prompt)
+            usage = getattr(case_msg, "response_metadata", {}).get("token_usage")
+            router.record("test_case_generation", self.model, time.time() - start_time, usage)
+            case_text = case_msg.content if hasattr(case_msg, "content") else str(case_msg)
+            parsed_records = self._parse_test_cases(case_text)
 
-        parsed_records = self._parse_test_cases(case_text)
         parsed_records = self._filter_duplicates(parsed_records)
         self._save_to_csv(parsed_records)
         return parsed_records
 
+    def _generate_structured(self, full_prompt: str):
+        messages = [{
+            "role": "user",
+            "content": full_prompt + "\n\n📤 위 출력 형식의 각 행을 JSON 스키마의 records 배열 항목 하나로 반환하십시오.",
+        }]
+        route = "test_case_generation"
+        name = "test_cases"
+
+        cases, failed = request_records(route, messages, name, TEST_CASE_RECORD_PROPERTIES, model=self.model)
+        print(f"📥 구조화 응답: 정상 {len(cases)}건 / 실패 {len(failed)}건")
+        if failed:
+            cases += retry_failed_records(
+                route, messages, failed, name, TEST_CASE_RECORD_PROPERTIES, model=self.model
+            )
+
+        records = []
+        for case in cases:
+            records.append({
+                "No.": self.global_case_counter,
+                "테스트 케이스 내용": case["테스트 케이스 내용"].strip(),
+                "사전조건": case["사전조건"].strip(),
+                "테스트 데이터": case["테스트 데이터"].strip(),
+                "예상 결과": case["예상 결과"].strip()
+            })
+            self.global_case_counter += 1
+        return records
+
     def _parse_test_cases(self, text: str):
         lines = [line.strip() for line in text.splitlines() if line.strip() and '|' in line]
         records = []
@@ -1,12 +1,19 @@
 import os
 import re
-import json
 import pandas as pd
-from openai import OpenAI
 from AI.tools.source_scanner import scan_source_files
 from AI.tools.keyword_extractor import extract_keywords
-
-client = OpenAI()
+from AI.utils.prompt_budget import PromptBudget
+from AI.utils.model_router import router
+from AI.utils.structured_output import request_records
+
+VALIDATION_RECORD_PROPERTIES = {
+    "No": {"type": "integer"},
+    "테스트 케이스 내용": {"type": "string"},
+    "사전조건": {"type": "string", "allow_empty": True},
+    "테스트 데이터": {"type": "string"},
+    "예상 결과": {"type": "string"},
+}
 
 class TestCaseValidationAgent:
     display_name = "테스트케이스 코드 검증 에이전트"
@@ -14,14 +21,39 @@ class TestCaseValidationAgent:
     category = "테스트케이스 검증"
     features = "- 전체 필드 수정 LLM 위임\n- 키워드 기반 코드 추출\n- 로그 기반 추적 및 CSV 반영"
 
-    def __init__(self, source_dir: str, case_csv_path: str):
+    def __init__(
+        self,
+        source_dir: str,
+        case_csv_path: str,
+        batch_size: int = 5,
+        max_prompt_tokens: int = 6000,
+        output_tokens_per_case: int = 400,
+        structured_output: bool = True,
+        model: str = None,
+    ):
         self.source_dir = source_dir
         self.case_csv_path = case_csv_path
+        self.batch_size = max(batch_size, 1)
+        self.structured_output = structured_output
+        # model은 기본 검증(validation) route에만 적용되고, 재검증 모델은 라우터 설정을 따릅니다.
+        self.model = model or router.model_for("validation")
+        self.budget = PromptBudget(
+            max_tokens=max_prompt_tokens,
+            model=self.model,
+            output_tokens_per_case=output_tokens_per_case,
+        )
+
+        # 고정 지시문은 매 요청의 맨 앞에 동일하게 두어 프롬프트 캐시를 활용합니다.
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        prompt_path = os.path.join(current_dir, "..", "prompts", "test_case_validation_prompt.txt")
+        with open(prompt_path, "r", encoding="utf-8") as f:
+            self.system_prompt = f.read()
 
     def run(self) -> list[dict]:
         df = pd.read_csv(self.case_csv_path).fillna("")
         results = []
         revised_rows = []
+        contexts = []
 
         for idx, row in df.iterrows():
             tc_no = row.get("No.", idx + 1)
@@ -43,9 +75,26 @@ class TestCaseValidationAgent:
             actual_messages = self._extract_message_strings(matched_code)
             print(f"💬 메시지 수: {len(actual_messages)}")
 
-            revised_testcase = self._suggest_fix_with_llm(testcase, actual_messages, matched_code)
+            contexts.append({
+                "row": row,
+                "testcase": testcase,
+                "actual_messages": actual_messages,
+                "matched_code": matched_code,
+            })
+
+        revised_map = {}
+        for start in range(0, len(contexts), self.batch_size):
+            batch = contexts[start:start + self.batch_size]
+            print(f"\n🧠 LLM 검증 요청: TC {', '.join(str(c['testcase']['No']) for c in batch)}")
+            revised_map.update(self._suggest_fix_with_llm(batch))
+
+        for ctx in contexts:
+            row = ctx["row"]
+            testcase = ctx["testcase"]
+            tc_no = testcase["No"]
+            revised_testcase = revised_map.get(str(tc_no), testcase)
 
-            print(f"✏️ 수정 완료: {revised_testcase}")
+            print(f"✏️ TC {tc_no} 수정 완료: {revised_testcase}")
 
             revised_rows.append({
                 "No.": tc_no,
@@ -65,103 +114,129 @@ class TestCaseValidationAgent:
         print(f"\n📁 수정된 테스트케이스 CSV 저장 완료: {self.case_csv_path}")
         return results
 
+    def _rank_files(self, matched_code: dict) -> list[tuple[str, list]]:
+        # 매칭 건수가 많은 파일을 먼저, 같으면 경로 순으로 두어 실행마다 같은 순서를 보장합니다.
+        return sorted(matched_code.items(), key=lambda item: (-len(item[1]), item[0]))
+
     def _extract_message_strings(self, matched_code: dict) -> list[str]:
-        message_set = set()
-        for _, lines in matched_code.items():
+        # 예산이 부족할 때 관련도 높은 메시지가 먼저 채워지도록, 상위 파일에서 처음 나온 순서를 유지합니다.
+        message_set = {}
+        for _, lines in self._rank_files(matched_code):
             for _, line in lines:
                 if any(x in line for x in ["{{", "}}", "t(", "t.", ".ts", ".vue"]): continue
                 if re.search(r"\w+\(.*\)", line): continue
                 found = re.findall(r"[\"']([^\"']{4,})[\"']", line)
                 for msg in found:
                     if not re.search(r'[가-힣a-zA-Z]{3,}', msg): continue
-                    message_set.add(msg.strip())
+                    message_set.setdefault(msg.strip(), None)
         return list(message_set)
 
-    def _suggest_fix_with_llm(self, testcase: dict, actual_messages: list[str], matched_code: dict) -> dict:
-        code_snippets = []
-        for file, lines in list(matched_code.items())[:2]:
-            snippet_header = f"📁 {os.path.basename(file)}"
-            snippet_lines = "\n".join([f"  {lineno}: {line}" for lineno, line in lines[:2]])
-            code_snippets.append(f"{snippet_header}\n{snippet_lines}")
-        code_snippet_text = "\n".join(code_snippets)
-        message_text = "\n".join(f"- {msg}" for msg in actual_messages[:10]) or "(없음)"
-
-        prompt = f"""
-당신은 테스트 자동화 전문가입니다.
-
-다음은 테스트케이스 설명과 코드 분석 결과입니다.
-이 테스트케이스는 실제 코드의 동작과 메시지를 바탕으로 **현실적인 테스트 항목**으로 수정되어야 합니다.
-
-🔧 작업 목표:
-- 테스트 목적과 절차가 명확하게 드러나도록 소스코드 토대로 설명을 보완하거나 수정하세요.
-- 테스트 절차는 핵심 흐름만 간결하게 요약된 한 문장이어야 합니다.
-- 'CommandAlias::SUCCESS' 같은 내부 상수는 금지하며, 해당 상수에 대응되는 실제 메시지 또는 상태 코드를 사용하세요.
-- 테스트 데이터는 실제 사용자의 입력 또는 API 요청에서 사용될 수 있는 형식으로 작성하세요.
-- 예상 결과는 사용자 인터페이스(UI)나 API 응답에서 실제로 **확인 가능한 메시지나 상태**만 포함하세요.
-- 예상 결과는 반드시 코드에서 추출된 메시지 중에서 선택하여 작성하세요.
-- 라우팅 경로(`/login`, `/admin/dashboard`)가 필요한 경우에는 실제 라우팅 경로를 포함하세요.
-- 테스트 데이터는 **실제 코드 변수명 그대로** 작성해야 하며, 자연어 표현(예: "상품 ID", "이메일")은 금지합니다.
-- 테스트 데이터에는 코드에서 확인되지 않는 항목을 포함하지 마세요.
-- 내부 경로나 i18n 키(`pages.xx.xx`, `app-login`, `t("...")`) 등은 제외하세요.
-- 반환 형식은 반드시 아래 JSON 구조로 출력하고, 불필요한 설명은 포함하지 마세요.
-
-
-📌 예시:
+    def _build_case_block(self, testcase: dict, actual_messages: list[str], matched_code: dict, budget: int) -> str:
+        header = f"""[TC No. {testcase["No"]}]
 기존 테스트케이스:
-- 내용: 로그인 시도 후 성공 여부 확인
-- 테스트 데이터: email=admin@example.com, password=1234
-- 예상 결과: 로그인 성공
-
-💬 코드 메시지: 
-- Login success
-- Invalid email or password
-
-🧩 코드 일부:
-📁 AuthService.ts
-  34: if (success) showMessage("Login success");
-📁 AuthService.ts
-  37: else showMessage("Invalid email or password");
-
-📤 출력 예시:
-{{
-  "테스트 케이스 내용": "사용자가 이메일과 비밀번호를 입력하여 로그인 후, 성공 여부를 확인하는 테스트",
-  "테스트 데이터": "email=admin@example.com, password=1234",
-  "예상 결과": "'Login success' 메시지가 출력되어야 하며, 실패 시 'Invalid email or password' 메시지가 출력되어야 함"
-}}
-
-
-📌 기존 테스트케이스:
 - 내용: {testcase["테스트 케이스 내용"]}
 - 사전조건: {testcase["사전조건"]}
 - 테스트 데이터: {testcase["테스트 데이터"]}
 - 예상 결과: {testcase["예상 결과"]}
+"""
+        # 라벨과 (없음) 대체 문구까지 포함한 빈 블록의 토큰을 먼저 뺍니다.
+        remaining = max(budget - self.budget.count(self._render_case_block(header, "", "")), 0)
+        newline_cost = self.budget.count("\n")
 
-🔧 주의:
-- 테스트는 반드시 **사전조건이 모두 만족된 상태**에서 실행됩니다.
-- 예: 사용자가 로그인된 상태라는 사전조건이 있는 경우, 다시 로그인하지 않습니다.
+        # 메시지는 예상 결과의 근거이므로 남은 예산의 절반까지 먼저 채웁니다.
+        messages, used = self.budget.pack([f"- {msg}" for msg in actual_messages], remaining // 2)
+        remaining -= used
 
+        # 코드는 매칭 건수가 많은 파일부터 예산이 허용하는 만큼 채웁니다.
+        code_snippets = []
+        for file, lines in self._rank_files(matched_code):
+            snippet_header = f"📁 {os.path.basename(file)}"
+            # 파일 헤더 뒤 줄바꿈과, 두 번째 파일부터는 앞 스니펫과의 줄바꿈까지 포함합니다.
+            header_cost = self.budget.count(snippet_header) + newline_cost * (2 if code_snippets else 1)
+            if header_cost >= remaining:
+                break
+            snippet_lines, used = self.budget.pack(
+                [f"  {lineno}: {line}" for lineno, line in lines], remaining - header_cost
+            )
+            if not snippet_lines:
+                continue
+            code_snippets.append(snippet_header + "\n" + "\n".join(snippet_lines))
+            remaining -= header_cost + used
+
+        return self._render_case_block(header, "\n".join(messages), "\n".join(code_snippets))
+
+    def _render_case_block(self, header: str, message_text: str, code_snippet_text: str) -> str:
+        return f"""{header}
 💬 코드에서 발견된 메시지:
-{message_text}
+{message_text or "(없음)"}
 
 🧩 코드 분석 결과 (일부):
-{code_snippet_text}
-
-📤 아래 형식으로 정확하게 출력하세요 (JSON만 반환):
-{{
-"테스트 케이스 내용": "여기에 전체 테스트 목적과 흐름을 요약하세요",
-"사전조건": "테스트 실행 전에 충족되어야 할 구체적인 조건 (예: 로그인 상태)",
-"테스트 데이터": "key1=value1, key2=value2",
-"예상 결과": "어떤 메시지가 출력되어야 하는지, 상태가 어떤지"
-}}
+{code_snippet_text or "(없음)"}
 """
 
+    def _suggest_fix_with_llm(self, batch: list[dict]) -> dict[str, dict]:
+        """여러 테스트케이스를 한 번의 요청으로 검증하고, TC 번호별 수정 결과를 반환합니다.
+
+        응답 레코드는 도착하는 대로 검증하며, 형식 오류·누락·신뢰도 검사 실패 케이스만 상위 모델로 재요청합니다.
+        """
+        revised_map = self._request_fixes(batch, "validation", strict=True)
+
+        failed = [ctx for ctx in batch if str(ctx["testcase"]["No"]) not in revised_map]
+        if failed:
+            print(f"🔁 상위 모델로 재검증: TC {', '.join(str(c['testcase']['No']) for c in failed)}")
+            revised_map.update(self._request_fixes(failed, "validation_escalation", strict=False))
+        return revised_map
+
+    def _request_fixes(self, batch: list[dict], route: str, strict: bool) -> dict[str, dict]:
+        # 응답 토큰은 배치 크기에 비례해 예약하고, 같은 값을 max_tokens로 전달해 요청 전체를 예산 안에 묶습니다.
+        separator = "\n\n"
+        separator_cost = self.budget.count(separator) * (len(batch) - 1)
+        case_budget = max(self.budget.available(self.system_prompt, cases=len(batch)) - separator_cost, 0) // len(batch)
+        user_prompt = separator.join(
+            self._build_case_block(ctx["testcase"], ctx["actual_messages"], ctx["matched_code"], case_budget)
+            for ctx in batch
+        )
+        user_tokens = self.budget.count(user_prompt)
+        print(f"🧮 프롬프트 토큰: 고정 {self.budget.count(self.system_prompt)} + 가변 {user_tokens}")
+        if user_tokens > self.budget.available(self.system_prompt, cases=len(batch)):
+            print("⚠️ 테스트케이스 기본 정보만으로 토큰 예산을 초과합니다. max_prompt_tokens 또는 batch_size를 조정하세요.")
+
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-            ).choices[0].message.content.strip()
-            return json.loads(response)
+            revised_list, _ = request_records(
+                route,
+                [
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "test_case_revisions",
+                VALIDATION_RECORD_PROPERTIES,
+                structured=self.structured_output,
+                max_tokens=self.budget.output_tokens(len(batch)),
+                model=self.model if route == "validation" else None,
+            )
         except Exception as e:
-            print(f"⚠️ LLM 수정 실패 → 원본 사용: {e}")
-            return testcase
+            print(f"⚠️ LLM 수정 실패 ({route}) → 원본 사용: {e}")
+            return {}
+
+        revised_map = {}
+        for ctx in batch:
+            testcase = ctx["testcase"]
+            revised = next((r for r in revised_list if str(r.get("No")) == str(testcase["No"])), None)
+            if revised is None:
+                print(f"⚠️ TC {testcase['No']} 응답 누락 ({route})")
+                continue
+            if strict and not self._is_confident(revised, ctx["actual_messages"]):
+                print(f"⚠️ TC {testcase['No']} 신뢰도 검사 실패 ({route})")
+                continue
+            revised_map[str(testcase["No"])] = {**testcase, **revised, "No": testcase["No"]}
+        return revised_map
+
+    def _is_confident(self, revised: dict, actual_messages: list[str]) -> bool:
+        # 필수 필드가 모두 채워져 있어야 합니다.
+        if any(not str(revised.get(field, "")).strip() for field in ["테스트 케이스 내용", "테스트 데이터", "예상 결과"]):
+            return False
+        # 코드 메시지가 있다면 예상 결과는 그중 하나 이상을 인용해야 합니다.
+        if actual_messages:
+            expected = str(revised["예상 결과"])
+            return any(msg in expected for msg in actual_messages)
+        return True
@@ -1,8 +1,18 @@
 import re
 import os
+import time
 import pandas as pd
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
+from AI.utils.model_router import router
+from AI.utils.structured_output import request_records, retry_failed_records
+
+SCENARIO_RECORD_PROPERTIES = {
+    "시나리오 ID": {"type": "string"},
+    "시나리오명": {"type": "string"},
+    "상세설명(흐름도)": {"type": "string"},
+    "검증포인트": {"type": "array", "items": {"type": "string"}},
+}
 
 
 class TestScenarioGenerationAgent:
@@ -11,8 +21,10 @@ class TestScenarioGenerationAgent:
     category = "테스트 시나리오 생성"
     features = "- 시나리오 ID, 명칭, 상세 흐름, 검증 포인트 추출 및 저장"
 
-    def __init__(self, temperature: float = 0.3, model: str = "gpt-4o-mini"):
-        self.llm = ChatOpenAI(temperature=temperature, model=model, streaming=True)
+    def __init__(self, temperature: float = 0.3, model: str = None, structured_output: bool = True):
+        self.structured_output = structured_output
+        self.model = model or router.model_for("scenario_generation")
+        self.llm = ChatOpenAI(temperature=temperature, model=self.model, streaming=True, stream_usage=True)
 
         current_dir = os.path.dirname(os.path.abspath(__file__))
         prompt_path = os.path.join(current_dir, "..", "prompts", "test_scenario_generation_prompt.txt")
@@ -42,12 +54,19 @@ class TestScenarioGenerationAgent:
 
         print("[LLM 통화] 전체 테스트케이스 기반의 시나리오 생성")
         full_prompt = self.prompt_template.format(test_case_list=case_text_block)
-        scenario_msg = self.llm.invoke(full_prompt)
-        scenario_text = scenario_msg.content if hasattr(scenario_msg, "content") else str(scenario_msg)
+        if self.structured_output:
+            parsed_rows = self._generate_structured(full_prompt)
+        else:
+            start_time = time.time()
+            scenario_msg = self.llm.invoke(full_prompt)
+            usage = getattr(scenario_msg, "response_metadata", {}).get("token_usage")
+            router.record("scenario_generation", self.model, time.time() - start_time, usage)
+            scenario_text = scenario_msg.content if hasattr(scenario_msg, "content") else str(scenario_msg)
+
+            print("💾 시나리오 원문:\n", scenario_text)
 
-        print("💾 시나리오 원문:\n", scenario_text)
+            parsed_rows = self._parse_scenario_text(scenario_text)
 
-        parsed_rows = self._parse_scenario_text(scenario_text)
         self._save_to_csv(parsed_rows)
 
         result_text = "\n".join([
@@ -57,6 +76,32 @@ class TestScenarioGenerationAgent:
         print(f"\n✅ 전체 시나리오 요약:\n{result_text}")
         return result_text
 
+    def _generate_structured(self, full_prompt: str):
+        messages = [{
+            "role": "user",
+            "content": full_prompt + "\n\n📤 각 시나리오를 JSON 스키마의 records 배열 항목 하나로 반환하고, 검증포인트는 항목별 문자열 목록으로 작성하십시오.",
+        }]
+        route = "scenario_generation"
+        name = "test_scenarios"
+
+        scenarios, failed = request_records(route, messages, name, SCENARIO_RECORD_PROPERTIES, model=self.model)
+        print(f"📥 구조화 응답: 정상 {len(scenarios)}건 / 실패 {len(failed)}건")
+        if failed:
+            scenarios += retry_failed_records(
+                route, messages, failed, name, SCENARIO_RECORD_PROPERTIES, model=self.model
+            )
+
+        records = []
+        for scenario in scenarios:
+            check_items = [str(item).strip() for item in scenario["검증포인트"] if str(item).strip()]
+            records.append({
+                "시나리오 ID": scenario["시나리오 ID"].strip(),
+                "시나리오명": scenario["시나리오명"].strip(),
+                "상세설명(흐름도)": scenario["상세설명(흐름도)"].strip(),
+                "검증포인트": "\n".join([f"{i+1}. {item}" for i, item in enumerate(check_items)])
+            })
+        return records
+
     def _parse_scenario_text(self, text: str):
         records = []
 
@@ -1,8 +1,6 @@
 import re
 import ast
-from openai import OpenAI
-
-client = OpenAI()
+from AI.utils.model_router import router
 
 def extract_keywords(testcase: dict) -> list[str]:
     # 1단계: 한국어 키워드 추출
@@ -21,11 +19,10 @@ def extract_keywords(testcase: dict) -> list[str]:
 - 설명 없이 리스트 형태만 출력하세요.
 """
     try:
-        response_ko = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": extract_prompt}],
-            temperature=0.3,
-        ).choices[0].message.content.strip()
+        response_ko = router.chat(
+            "keyword_extraction",
+            [{"role": "user", "content": extract_prompt}],
+        )
 
         keyword_list_ko = ast.literal_eval(response_ko)
     except Exception:
@@ -58,11 +55,10 @@ def extract_keywords(testcase: dict) -> list[str]:
 - 설명 없이 결과만 출력하세요.
 """
     try:
-        response_en = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": translate_prompt}],
-            temperature=0.3,
-        ).choices[0].message.content.strip()
+        response_en = router.chat(
+            "translation",
+            [{"role": "user", "content": translate_prompt}],
+        )
     except Exception:
         return []
 
@@ -0,0 +1,155 @@
+import os
+import time
+from collections import Counter
+from openai import OpenAI
+
+# ✅ 호출 유형(route)별 기본 모델
+# 코드 수정 없이 환경변수(.env)로 교체할 수 있습니다. 예: LLM_MODEL_VALIDATION=gpt-4o
+DEFAULT_ROUTES = {
+    "keyword_extraction": "gpt-4o-mini",
+    "translation": "gpt-4o-mini",
+    "validation": "gpt-4o-mini",
+    "validation_escalation": "gpt-4o",
+    "test_case_generation": "gpt-4o-mini",
+    "scenario_generation": "gpt-4o-mini",
+}
+
+# ✅ 모델별 단가 (USD / 1M 토큰, 입력·출력)
+# 날짜가 붙은 ID(gpt-4o-2024-08-06 등)는 가장 긴 접두사로 찾습니다.
+MODEL_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+
+def price_for(model: str):
+    """모델 단가를 반환합니다. 단가표에 없는 모델은 None입니다."""
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    if not matches:
+        return None
+    return MODEL_PRICES[max(matches, key=len)]
+
+
+class ModelRouter:
+    """호출 유형별로 모델을 선택하고, route별 지연 시간과 비용을 누적합니다."""
+
+    def __init__(self, routes: dict = None):
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.stats = {}
+        self._client = None
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI()
+        return self._client
+
+    def model_for(self, route: str) -> str:
+        # 환경변수는 호출 시점에 읽어 load_dotenv() 이후 값도 반영되도록 합니다.
+        env_model = os.getenv(f"LLM_MODEL_{route.upper()}")
+        if env_model:
+            return env_model
+        if route not in self.routes:
+            raise ValueError(f"알 수 없는 route입니다: {route}")
+        return self.routes[route]
+
+    def chat(self, route: str, messages: list[dict], temperature: float = 0.3, max_tokens: int = None) -> str:
+        model = self.model_for(route)
+        kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+        start_time = time.time()
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs,
+        )
+        usage = response.usage.model_dump() if response.usage else {}
+        self.record(route, model, time.time() - start_time, usage)
+        return response.choices[0].message.content.strip()
+
+    def stream_chat(
+        self,
+        route: str,
+        messages: list[dict],
+        temperature: float = 0.3,
+        response_format: dict = None,
+        max_tokens: int = None,
+        model: str = None,
+    ):
+        """응답을 조각 단위로 내보내며, 스트림이 끝나면 사용량을 기록합니다.
+
+        model을 지정하면 route 설정 대신 해당 모델을 사용하고, 통계는 route 기준으로 누적합니다.
+        """
+        model = model or self.model_for(route)
+        kwargs = {}
+        if response_format:
+            kwargs["response_format"] = response_format
+        if max_tokens:
+            kwargs["max_tokens"] = max_tokens
+        start_time = time.time()
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+
+        usage = {}
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage.model_dump()
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        self.record(route, model, time.time() - start_time, usage)
+
+    def record(self, route: str, model: str, elapsed: float, usage: dict = None):
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        price = price_for(model)
+        # 사용량이 보고되지 않은 호출(스트리밍 등)은 0원이 아니라 비용 미상으로 둡니다.
+        cost = None
+        if price and usage.get("prompt_tokens") is not None:
+            cost = (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+        stat = self.stats.setdefault(route, {
+            "models": Counter(),
+            "calls": 0,
+            "seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost": 0.0,
+        })
+        # 에이전트의 model 인자나 환경변수로 한 route에서 여러 모델이 쓰일 수 있습니다.
+        stat["models"][model] += 1
+        stat["calls"] += 1
+        stat["seconds"] += elapsed
+        stat["prompt_tokens"] += prompt_tokens
+        stat["completion_tokens"] += completion_tokens
+        # 단가를 모르는 호출이 하나라도 섞이면 비용은 unknown으로 표시합니다.
+        stat["cost"] = None if cost is None or stat["cost"] is None else stat["cost"] + cost
+
+    def print_summary(self):
+        if not self.stats:
+            return
+        print("\n📊 모델 호출 통계 (route별):")
+        for route, s in self.stats.items():
+            avg = s["seconds"] / s["calls"]
+            cost_text = "unknown" if s["cost"] is None else f"${s['cost']:.4f}"
+            model_text = ", ".join(f"{model} ×{count}" for model, count in s["models"].items())
+            print(
+                f"  {route} [{model_text}] 호출 {s['calls']}회 | 총 {s['seconds']:.1f}초 (평균 {avg:.1f}초)"
+                f" | 토큰 {s['prompt_tokens']}+{s['completion_tokens']} | {cost_text}"
+            )
+
+
+# 모든 에이전트와 툴이 공유하는 라우터
+router = ModelRouter()
@@ -0,0 +1,41 @@
+import tiktoken
+
+
+class PromptBudget:
+    """로컬 토크나이저(tiktoken)로 프롬프트 토큰을 측정하고, 예산 안에서 컨텍스트를 채워 넣습니다."""
+
+    def __init__(self, max_tokens: int = 6000, model: str = "gpt-4", output_tokens_per_case: int = 400):
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        # 입력과 출력을 합친 요청당 토큰 예산
+        self.max_tokens = max_tokens
+        # 케이스 하나의 응답 생성용으로 남겨둘 토큰
+        self.output_tokens_per_case = output_tokens_per_case
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def output_tokens(self, cases: int = 1) -> int:
+        """요청의 max_tokens로 전달할 응답 예산입니다."""
+        return self.output_tokens_per_case * cases
+
+    def available(self, *fixed_texts: str, cases: int = 1) -> int:
+        used = sum(self.count(t) for t in fixed_texts)
+        return max(self.max_tokens - self.output_tokens(cases) - used, 0)
+
+    def pack(self, items: list[str], budget: int, separator: str = "\n") -> tuple[list[str], int]:
+        """순서대로 예산에 들어가는 항목만 채워 넣고, (채택 항목, 사용 토큰)을 반환합니다."""
+        packed = []
+        used = 0
+        sep_tokens = self.count(separator)
+
+        for item in items:
+            cost = self.count(item) + (sep_tokens if packed else 0)
+            if used + cost > budget:
+                continue
+            packed.append(item)
+            used += cost
+
+        return packed, used
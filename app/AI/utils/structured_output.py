@@ -0,0 +1,233 @@
+import json
+from AI.utils.model_router import router
+
+
+class JSONRecordStream:
+    """스트리밍 응답에서 배열 안의 JSON 객체를 완성되는 즉시 하나씩 잘라냅니다.
+
+    `[{...}, {...}]` 와 `{"records": [{...}, {...}]}` 형태를 모두 지원하며,
+    한 레코드가 깨져도 나머지 레코드는 그대로 꺼낼 수 있도록 파싱은 레코드 단위로 합니다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.array_depth = None
+        self.record_start = None
+
+    def feed(self, chunk: str) -> list[str]:
+        self.buffer += chunk
+        raws = []
+
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                # 객체를 담은 첫 번째 배열을 레코드 배열로 봅니다.
+                if ch == "{" and self.stack and self.stack[-1] == "[":
+                    if self.array_depth is None:
+                        self.array_depth = len(self.stack)
+                    if len(self.stack) == self.array_depth:
+                        self.record_start = self.pos
+                self.stack.append(ch)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if ch == "}" and self.record_start is not None and len(self.stack) == self.array_depth:
+                    raws.append(self.buffer[self.record_start:self.pos + 1])
+                    self.record_start = None
+
+            self.pos += 1
+
+        return raws
+
+    def close(self) -> list[str]:
+        # 닫히지 않은 레코드는 실패 레코드로 넘겨 재요청 대상이 되도록 합니다.
+        if self.record_start is not None:
+            return [self.buffer[self.record_start:]]
+        # 레코드 배열 없이 단일 객체만 반환된 경우
+        if self.array_depth is None and self.buffer.strip():
+            try:
+                data = json.loads(self.buffer)
+            except json.JSONDecodeError:
+                return [self.buffer.strip()]
+            if isinstance(data, list) or (isinstance(data, dict) and "records" in data):
+                return []
+            return [self.buffer.strip()]
+        return []
+
+
+# JSON 스키마 키워드가 아니라 validate_record에서만 쓰는 속성 옵션
+VALIDATION_ONLY_KEYS = {"allow_empty"}
+
+
+def build_response_format(name: str, properties: dict) -> dict:
+    """레코드 스키마를 OpenAI structured output(json_schema) 형식으로 감쌉니다."""
+    schema_properties = {
+        field: {key: value for key, value in spec.items() if key not in VALIDATION_ONLY_KEYS}
+        for field, spec in properties.items()
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "records": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": schema_properties,
+                            "required": list(properties),
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["records"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def coerce_record(record, properties: dict):
+    """스키마가 강제되지 않는 텍스트 모드 응답을 위해, 숫자 문자열로 온 정수 필드를 정수로 바꿉니다."""
+    if not isinstance(record, dict):
+        return record
+
+    for field, spec in properties.items():
+        value = record.get(field)
+        if spec.get("type") == "integer" and isinstance(value, str) and value.strip().isdigit():
+            record[field] = int(value.strip())
+    return record
+
+
+def validate_record(record, properties: dict) -> list[str]:
+    if not isinstance(record, dict):
+        return ["레코드가 JSON 객체가 아닙니다."]
+
+    errors = []
+    for field, spec in properties.items():
+        value = record.get(field)
+        field_type = spec.get("type")
+
+        if field_type == "string":
+            if not isinstance(value, str):
+                errors.append(f"'{field}' 값이 문자열이 아닙니다.")
+            elif not value.strip() and not spec.get("allow_empty"):
+                errors.append(f"'{field}' 값이 비어 있습니다.")
+        elif field_type == "integer":
+            if isinstance(value, bool) or not isinstance(value, int):
+                errors.append(f"'{field}' 값이 정수가 아닙니다.")
+        elif field_type == "array":
+            if not isinstance(value, list) or not value or not all(str(v).strip() for v in value):
+                errors.append(f"'{field}' 값이 비어 있거나 목록이 아닙니다.")
+
+    return errors
+
+
+def iter_records(chunks, properties: dict):
+    """응답 조각을 받는 대로 레코드를 잘라 검증하고, (레코드, 원문, 오류 목록)을 순서대로 내보냅니다."""
+    stream = JSONRecordStream()
+
+    def check(raw: str):
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as e:
+            return None, raw, [f"JSON 파싱 실패: {e}"]
+        record = coerce_record(record, properties)
+        errors = validate_record(record, properties)
+        return (None if errors else record), raw, errors
+
+    for chunk in chunks:
+        for raw in stream.feed(chunk):
+            yield check(raw)
+    for raw in stream.close():
+        yield check(raw)
+
+
+def request_records(
+    route: str,
+    messages: list[dict],
+    name: str,
+    properties: dict,
+    structured: bool = True,
+    max_tokens: int = None,
+    model: str = None,
+) -> tuple[list[dict], list[tuple[str, list[str]]]]:
+    """LLM 응답을 스트리밍으로 받아 검증된 레코드와 실패한 레코드(원문, 오류)를 나눠 반환합니다."""
+    response_format = build_response_format(name, properties) if structured else None
+    records = []
+    failed = []
+
+    chunks = router.stream_chat(route, messages, response_format=response_format, max_tokens=max_tokens, model=model)
+    for record, raw, errors in iter_records(chunks, properties):
+        if errors:
+            print(f"⚠️ 레코드 검증 실패: {'; '.join(errors)}")
+            failed.append((raw, errors))
+        else:
+            records.append(record)
+
+    return records, failed
+
+
+def retry_failed_records(
+    route: str,
+    messages: list[dict],
+    failed: list[tuple[str, list[str]]],
+    name: str,
+    properties: dict,
+    structured: bool = True,
+    max_retries: int = 1,
+    model: str = None,
+) -> list[dict]:
+    """원래 요청에 실패한 레코드 목록을 덧붙여 해당 레코드만 다시 요청하고, 복구된 레코드를 반환합니다.
+
+    잘린 레코드도 원래 요구사항과 입력 정보를 근거로 다시 작성할 수 있도록 원래 messages를 그대로 보냅니다.
+    """
+    recovered = []
+
+    for attempt in range(max_retries):
+        if not failed:
+            break
+        print(f"🔁 실패 레코드 {len(failed)}건 재요청 ({attempt + 1}/{max_retries})")
+
+        failed_text = "\n\n".join(
+            f"[레코드 {i + 1}]\n원문: {raw}\n오류: {'; '.join(errors)}"
+            for i, (raw, errors) in enumerate(failed)
+        )
+        field_text = ", ".join(
+            f"{field}({spec['type']}{', 빈 값 허용' if spec.get('allow_empty') else ''})"
+            for field, spec in properties.items()
+        )
+        retry_prompt = f"""
+위 요청에 대한 이전 응답 중 아래 레코드들이 형식 오류 또는 응답 잘림으로 검증에 실패했습니다.
+위 요청 내용을 근거로 이 레코드들만 다시 작성하세요. 이미 정상 처리된 다른 레코드는 반복하지 마세요.
+
+- 필수 필드: {field_text}
+- '빈 값 허용' 표시가 없는 필드는 비어 있으면 안 됩니다.
+- 반환 형식: {{"records": [ ... ]}} (설명 없이 JSON만 출력)
+
+{failed_text}
+"""
+        retry_messages = messages + [{"role": "user", "content": retry_prompt}]
+        records, failed = request_records(route, retry_messages, name, properties, structured, model=model)
+        recovered.extend(records)
+
+    if failed:
+        print(f"⚠️ 재요청 후에도 복구하지 못한 레코드 {len(failed)}건은 제외합니다.")
+    return recovered
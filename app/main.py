@@ -7,6 +7,7 @@ from typing import TypedDict, Dict, Any
 from AI.agents.TestScenarioGenAgent import TestScenarioGenerationAgent
 from AI.agents.TestCaseGenAgent import TestCaseGenerationAgent
 from AI.agents.TestCaseValidationAgent import TestCaseValidationAgent
+from AI.utils.model_router import router
 
 # ✅ 경로 설정
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -96,4 +97,5 @@ if __name__ == "__main__":
 
     print("\n✅ 최종 테스트 시나리오 생성 결과:\n")
     print(result["output"])
+    router.print_summary()
     print(f"\n🕒 총 소요 시간: {minutes}분 {seconds}초")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# ✅ `AI.` 패키지를 main.py와 같은 기준(app/)으로 import 하도록 경로 설정
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+import pytest
+from AI.utils.model_router import MODEL_PRICES, ModelRouter, price_for
+
+USAGE = {"prompt_tokens": 1_000_000, "completion_tokens": 1_000_000}
+
+
+@pytest.mark.parametrize("model, family", [
+    ("gpt-4o", "gpt-4o"),
+    ("gpt-4o-2024-08-06", "gpt-4o"),
+    ("gpt-4o-mini-2024-07-18", "gpt-4o-mini"),
+    ("gpt-4-turbo-preview", "gpt-4-turbo"),
+    ("gpt-4-0613", "gpt-4"),
+    ("gpt-4.1-mini", "gpt-4.1-mini"),
+])
+def test_price_for_uses_longest_prefix(model, family):
+    assert price_for(model) == MODEL_PRICES[family]
+
+
+@pytest.mark.parametrize("model", ["o3-mini", "gpt-4x", "claude-3"])
+def test_price_for_unknown_model(model):
+    assert price_for(model) is None
+
+
+def test_model_for_reads_env_override(monkeypatch):
+    router = ModelRouter()
+    monkeypatch.setenv("LLM_MODEL_TRANSLATION", "gpt-4.1-nano")
+
+    assert router.model_for("translation") == "gpt-4.1-nano"
+    assert router.model_for("validation") == "gpt-4o-mini"
+
+
+def test_model_for_unknown_route_raises(monkeypatch):
+    monkeypatch.delenv("LLM_MODEL_NOT_A_ROUTE", raising=False)
+
+    with pytest.raises(ValueError):
+        ModelRouter().model_for("not_a_route")
+
+
+def test_record_accumulates_cost_and_models():
+    router = ModelRouter()
+    router.record("validation", "gpt-4o-mini", 1.0, USAGE)
+    router.record("validation", "gpt-4o-2024-08-06", 2.0, USAGE)
+    router.record("validation", "gpt-4o-mini", 1.0, USAGE)
+
+    stat = router.stats["validation"]
+    assert stat["calls"] == 3
+    assert stat["seconds"] == 4.0
+    assert stat["models"] == {"gpt-4o-mini": 2, "gpt-4o-2024-08-06": 1}
+    assert stat["cost"] == pytest.approx(2 * (0.15 + 0.6) + (2.5 + 10.0))
+
+
+@pytest.mark.parametrize("model, usage", [
+    ("o3-mini", USAGE),
+    ("gpt-4o-mini", None),
+    ("gpt-4o-mini", {}),
+])
+def test_unknown_cost_stays_unknown(model, usage):
+    router = ModelRouter()
+    router.record("scenario_generation", "gpt-4o-mini", 1.0, USAGE)
+    router.record("scenario_generation", model, 1.0, usage)
+    router.record("scenario_generation", "gpt-4o-mini", 1.0, USAGE)
+
+    assert router.stats["scenario_generation"]["cost"] is None
+
+
+def test_print_summary_lists_models_and_unknown_cost(capsys):
+    router = ModelRouter()
+    router.record("validation", "gpt-4o-mini", 1.0, USAGE)
+    router.record("validation", "gpt-4o", 1.0, USAGE)
+    router.record("translation", "o3-mini", 1.0, USAGE)
+    router.print_summary()
+
+    out = capsys.readouterr().out
+    assert "gpt-4o-mini ×1, gpt-4o ×1" in out
+    assert "unknown" in out
@@ -0,0 +1,56 @@
+import pytest
+from AI.utils import prompt_budget
+from AI.utils.prompt_budget import PromptBudget
+
+
+class CharEncoding:
+    """문자 하나를 토큰 하나로 세는 테스트용 인코딩"""
+
+    def encode(self, text: str) -> list[str]:
+        return list(text)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(prompt_budget.tiktoken, "encoding_for_model", lambda model: CharEncoding())
+    return PromptBudget(max_tokens=100, output_tokens_per_case=10)
+
+
+def test_unknown_model_falls_back_to_cl100k(monkeypatch):
+    def unknown(model):
+        raise KeyError(model)
+
+    monkeypatch.setattr(prompt_budget.tiktoken, "encoding_for_model", unknown)
+    monkeypatch.setattr(prompt_budget.tiktoken, "get_encoding", lambda name: name)
+
+    assert PromptBudget(model="my-model").encoding == "cl100k_base"
+
+
+def test_pack_counts_separators(budget):
+    packed, used = budget.pack(["aaa", "bbb", "ccc"], budget=7)
+
+    # "aaa" 3 + "\n" 1 + "bbb" 3 = 7, 세 번째 항목은 구분자까지 8토큰이 필요해 제외됩니다.
+    assert packed == ["aaa", "bbb"]
+    assert used == 7
+    assert used == budget.count("\n".join(packed))
+
+
+def test_pack_skips_oversize_items_and_keeps_filling(budget):
+    packed, used = budget.pack(["a" * 20, "bb", "c" * 9, "dd"], budget=6)
+
+    assert packed == ["bb", "dd"]
+    assert used == 5
+
+
+def test_pack_with_no_budget_returns_nothing(budget):
+    assert budget.pack(["a"], budget=0) == ([], 0)
+
+
+def test_available_reserves_output_per_case(budget):
+    assert budget.output_tokens(cases=3) == 30
+    assert budget.available("x" * 20, cases=1) == 100 - 10 - 20
+    assert budget.available("x" * 20, cases=3) == 100 - 30 - 20
+
+
+def test_available_never_goes_negative(budget):
+    assert budget.available("x" * 95, cases=2) == 0
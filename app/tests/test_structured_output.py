@@ -0,0 +1,143 @@
+import json
+import pytest
+from AI.utils import structured_output
+from AI.utils.structured_output import (
+    JSONRecordStream,
+    build_response_format,
+    iter_records,
+    retry_failed_records,
+    validate_record,
+)
+
+PROPERTIES = {
+    "No": {"type": "integer"},
+    "내용": {"type": "string"},
+    "사전조건": {"type": "string", "allow_empty": True},
+    "검증포인트": {"type": "array", "items": {"type": "string"}},
+}
+
+
+def record(no, text="로그인 성공 확인"):
+    return {"No": no, "내용": text, "사전조건": "", "검증포인트": ["메시지 확인"]}
+
+
+def chunked(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 10_000])
+def test_wrapped_records_are_emitted_across_chunks(size):
+    text = json.dumps({"records": [record(1), record(2)]}, ensure_ascii=False)
+
+    results = list(iter_records(chunked(text, size), PROPERTIES))
+
+    assert [r for r, _, _ in results] == [record(1), record(2)]
+    assert all(not errors for _, _, errors in results)
+
+
+@pytest.mark.parametrize("size", [1, 4, 10_000])
+def test_braces_and_escaped_quotes_inside_strings(size):
+    tricky = record(1, 'showMessage("{ok}") → [done] \\ "}]"')
+    text = json.dumps([tricky, record(2)], ensure_ascii=False)
+
+    results = [r for r, _, _ in iter_records(chunked(text, size), PROPERTIES)]
+
+    assert results == [tricky, record(2)]
+
+
+def test_nested_objects_stay_inside_their_record():
+    stream = JSONRecordStream()
+    nested = {"No": 1, "meta": {"steps": [{"id": 1}, {"id": 2}]}}
+    text = json.dumps({"records": [nested, {"No": 2}]})
+
+    raws = []
+    for chunk in chunked(text, 5):
+        raws.extend(stream.feed(chunk))
+    raws.extend(stream.close())
+
+    assert [json.loads(raw) for raw in raws] == [nested, {"No": 2}]
+
+
+def test_bad_record_in_the_middle_does_not_drop_the_rest():
+    text = (
+        '{"records": ['
+        + json.dumps(record(1), ensure_ascii=False)
+        + ', {"No": 2, "내용": oops}, '
+        + json.dumps(record(3), ensure_ascii=False)
+        + "]}"
+    )
+
+    results = list(iter_records(chunked(text, 6), PROPERTIES))
+
+    assert [r for r, _, _ in results] == [record(1), None, record(3)]
+    assert results[1][1] == '{"No": 2, "내용": oops}'
+    assert results[1][2][0].startswith("JSON 파싱 실패")
+
+
+def test_truncated_final_record_is_reported_as_failed():
+    text = '{"records": [' + json.dumps(record(1), ensure_ascii=False) + ', {"No": 2, "내용": "잘린'
+
+    results = list(iter_records(chunked(text, 8), PROPERTIES))
+
+    assert results[0][0] == record(1)
+    assert results[1][0] is None
+    assert results[1][1] == '{"No": 2, "내용": "잘린'
+
+
+def test_single_bare_object_is_treated_as_one_record():
+    text = json.dumps(record(7), ensure_ascii=False)
+
+    results = list(iter_records(chunked(text, 4), PROPERTIES))
+
+    assert [r for r, _, _ in results] == [record(7)]
+
+
+def test_empty_records_and_free_text():
+    assert list(iter_records(['{"records": []}'], PROPERTIES)) == []
+    [(parsed, raw, errors)] = iter_records(["죄송합니다"], PROPERTIES)
+    assert parsed is None and raw == "죄송합니다" and errors
+
+
+def test_numeric_string_integer_is_coerced():
+    text = json.dumps([{**record(1), "No": "3"}], ensure_ascii=False)
+
+    [(parsed, _, errors)] = iter_records([text], PROPERTIES)
+
+    assert errors == []
+    assert parsed["No"] == 3
+
+
+def test_validate_record_respects_allow_empty():
+    assert validate_record(record(1), PROPERTIES) == []
+    errors = validate_record({**record(1), "내용": " ", "검증포인트": []}, PROPERTIES)
+    assert len(errors) == 2
+    assert validate_record(["not", "a", "dict"], PROPERTIES)
+
+
+def test_response_format_strips_validation_only_keys():
+    schema = build_response_format("cases", PROPERTIES)["json_schema"]["schema"]
+    items = schema["properties"]["records"]["items"]
+
+    assert items["properties"]["사전조건"] == {"type": "string"}
+    assert items["required"] == list(PROPERTIES)
+
+
+def test_retry_resends_original_messages_with_failed_records(monkeypatch):
+    calls = []
+
+    def fake_stream_chat(route, messages, response_format=None, max_tokens=None, model=None):
+        calls.append({"route": route, "messages": messages, "model": model})
+        yield json.dumps({"records": [record(2)]}, ensure_ascii=False)
+
+    monkeypatch.setattr(structured_output.router, "stream_chat", fake_stream_chat)
+    original = [{"role": "user", "content": "요구사항 원문"}]
+    failed = [('{"No": 2, "내용": "잘린', ["JSON 파싱 실패"])]
+
+    recovered = retry_failed_records("test_case_generation", original, failed, "cases", PROPERTIES, model="gpt-4o")
+
+    assert recovered == [record(2)]
+    [call] = calls
+    assert call["model"] == "gpt-4o"
+    assert call["messages"][0] == original[0]
+    assert '{"No": 2, "내용": "잘린' in call["messages"][-1]["content"]
+    assert len(original) == 1